@@ -0,0 +1,229 @@
+import requests
+import requests_cache
+import ijson
+from datetime import timedelta
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+import asyncio
+import aiohttp
+from aiohttp import StreamReader
+from aiohttp_client_cache import CachedSession, SQLiteBackend
+import logging
+import threading
+import time
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.util.retry import Retry
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Statuses retried by both the sync and async request paths
+RETRY_STATUSES = [429, 500, 502, 503, 504]
+
+# MusicBrainz data for released music rarely changes, so cached responses stay valid for a month
+CACHE_EXPIRE_AFTER = timedelta(days=30)
+
+# Retry policy and connection pool shared by every sync session
+MAX_RETRIES = 5
+BACKOFF_FACTOR = 2
+RETRY_STRATEGY = Retry(
+    total=MAX_RETRIES,
+    backoff_factor=BACKOFF_FACTOR,
+    status_forcelist=RETRY_STATUSES,
+    respect_retry_after_header=True,
+    allowed_methods=frozenset(["GET"]),
+)
+HTTP_ADAPTER = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=RETRY_STRATEGY)
+
+class RateLimiter:
+    """Paces requests from the rate-limit headers MusicBrainz sends back.
+    Requests go out immediately while X-RateLimit-Remaining allows it and wait for
+    X-RateLimit-Reset (or Retry-After) once it is exhausted. Without a reset still ahead
+    (before the first response, or when no reset was sent) requests are spaced by min_delay."""
+    def __init__(self, min_delay: float = 1.0):
+        self.min_delay = min_delay
+        self.remaining = None
+        # Monotonic clock so NTP/wall-clock jumps can't cause long sleeps or bursts
+        self.reset_at = 0.0
+        self.last_request_time = time.monotonic() - self.min_delay
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def parse_retry_after(value: str, default: float) -> float:
+        """Parse a Retry-After header given either as seconds or an HTTP date"""
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return default
+    
+    def update(self, headers):
+        """Record the limit state from a response's headers. Malformed values are
+        ignored, leaving requests spaced by min_delay."""
+        now = time.monotonic()
+        retry_after = headers.get("Retry-After")
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        with self._lock:
+            if retry_after is not None:
+                wait = self.parse_retry_after(retry_after, self.min_delay)
+                self.remaining = 0
+                self.reset_at = max(self.reset_at, now + wait)
+            elif remaining is not None:
+                try:
+                    self.remaining = int(remaining)
+                    if reset is not None:
+                        # Reset is sent as epoch seconds; convert it to the monotonic clock
+                        self.reset_at = now + max(float(reset) - time.time(), 0)
+                except ValueError:
+                    self.remaining = None
+    
+    def _reserve(self) -> float:
+        """Reserve the next request slot under the lock and return its monotonic deadline.
+        Once the quota is exhausted, callers queue behind the reset min_delay apart
+        instead of all waking at the reset together."""
+        with self._lock:
+            now = time.monotonic()
+            if self.remaining is not None and now >= self.reset_at:
+                # The window the count belonged to has passed (or no reset was ever
+                # sent), so the count says nothing; fall back to min_delay spacing
+                self.remaining = None
+            if self.remaining is not None:
+                if self.remaining > 1:
+                    self.remaining -= 1
+                    return now
+                now = self.reset_at
+            deadline = max(now, self.last_request_time + self.min_delay)
+            self.last_request_time = deadline
+            return deadline
+    
+    def wait_if_needed(self):
+        delay = self._reserve() - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+    
+    async def wait_if_needed_async(self):
+        # Sleeping on the event loop lets other page fetches proceed meanwhile
+        delay = self._reserve() - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+# MusicBrainz limits requests per IP, so every API instance and worker thread shares one limiter
+rate_limiter = RateLimiter(min_delay=1.1)
+
+async def read_browse_page(content: StreamReader, entity: str) -> dict:
+    """Stream-parse a browse page with ijson. Items under "<entity>s" are built one at a
+    time as the body is read; top-level scalars such as "<entity>-count" are kept as-is."""
+    items = []
+    page = {f"{entity}s": items}
+    item_prefix = f"{entity}s.item"
+    builder = None
+    async for prefix, event, value in ijson.parse_async(content, use_float=True):
+        if builder is None and prefix == item_prefix and event == "start_map":
+            builder = ijson.ObjectBuilder()
+        if builder is not None:
+            builder.event(event, value)
+            if prefix == item_prefix and event == "end_map":
+                items.append(builder.value)
+                builder = None
+        elif prefix and "." not in prefix and event in ("number", "string"):
+            page[prefix] = value
+    return page
+
+class MusicBrainzAPI:
+    def __init__(self, app_name: str, version: str, contact: str):
+        self.base_url = "https://musicbrainz.org/ws/2"
+        self.user_agent = f"{app_name}/{version} ( {contact} )"
+        self.rate_limiter = rate_limiter
+        
+        # One pooled session for all sync requests so connections (and TLS) are reused.
+        # Responses are cached on disk for 30 days; artist IDs never change, so lookups never expire.
+        self.headers = {"User-Agent": self.user_agent, "Accept": "application/json"}
+        self.session = requests_cache.CachedSession(
+            "mb_cache",
+            backend="sqlite",
+            expire_after=CACHE_EXPIRE_AFTER,
+            urls_expire_after={f"{self.base_url}/artist": requests_cache.NEVER_EXPIRE},
+            allowable_methods=("GET",)
+        )
+        self.session.headers.update(self.headers)
+        self.session.mount("https://", HTTP_ADAPTER)
+        self._base = self.base_url + "/"
+        
+    def make_request(self, endpoint: str, params: Dict = None) -> requests.Response:
+        if params is None:
+            params = {}
+        params["fmt"] = "json"
+        
+        try:
+            # Cache hits skip the rate limiter entirely
+            response = self.get_cached(self._base + endpoint, params)
+            if response is not None:
+                return response
+            
+            self.rate_limiter.wait_if_needed()
+            response = self.session.get(self._base + endpoint, params=params, timeout=30)
+            self.rate_limiter.update(response.headers)
+            response.raise_for_status()
+            return response
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Request failed for endpoint {endpoint}: {str(e)}")
+            raise
+
+    def get_cached(self, url: str, params: Dict) -> Optional[requests.Response]:
+        """Return the fresh cached response for a GET, or None, without touching the network"""
+        request = self.session.prepare_request(requests.Request("GET", url, params=params))
+        response = self.session.cache.get_response(self.session.cache.create_key(request))
+        if response is None or response.is_expired:
+            return None
+        return response
+
+    def open_async_session(self) -> CachedSession:
+        """aiohttp session for concurrent pagination, holding a single connection to MusicBrainz.
+        Pages are cached on disk like the sync session's responses (kept in a separate file,
+        since the two cache libraries use different formats)."""
+        return CachedSession(
+            cache=SQLiteBackend("mb_async_cache", expire_after=CACHE_EXPIRE_AFTER, allowed_methods=("GET",)),
+            headers=self.headers,
+            connector=aiohttp.TCPConnector(limit_per_host=1),
+            timeout=aiohttp.ClientTimeout(total=30)
+        )
+    
+    async def make_request_async(self, session: CachedSession, endpoint: str, params: Dict = None) -> dict:
+        """Async counterpart of make_request for browse endpoints, returning the parsed page.
+        Retries the same statuses as the sync retry strategy, with exponential backoff."""
+        params = {**(params or {}), "fmt": "json"}
+        url = self._base + endpoint
+        
+        try:
+            # Cache hits skip the rate limiter entirely
+            cached = await session.cache.get_response(session.cache.create_key("GET", url, params=params))
+            if cached is not None:
+                return await read_browse_page(cached.content, endpoint)
+            
+            for attempt in range(MAX_RETRIES + 1):
+                await self.rate_limiter.wait_if_needed_async()
+                async with session.get(url, params=params) as response:
+                    self.rate_limiter.update(response.headers)
+                    if response.status in RETRY_STATUSES and attempt < MAX_RETRIES:
+                        # A Retry-After header has already pushed back the limiter
+                        if "Retry-After" not in response.headers:
+                            await asyncio.sleep(BACKOFF_FACTOR * 2 ** attempt)
+                        continue
+                    response.raise_for_status()
+                    return await read_browse_page(response.content, endpoint)
+        except aiohttp.ClientError as e:
+            logger.error(f"Request failed for endpoint {endpoint}: {str(e)}")
+            raise
+
+@lru_cache(maxsize=4096)
+def resolve_artist_id(api: MusicBrainzAPI, name_key: str) -> str:
+    """Look up an artist's MBID. Cached on the normalized name, since the mapping doesn't change."""
+    response = api.make_request("artist", params={"query": name_key})
+    artists = response.json().get("artists", [])
+    if not artists:
+        raise ValueError(f"No artist found for name: {name_key}")
+    return artists[0]["id"]
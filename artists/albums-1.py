@@ -1,14 +1,28 @@
 import requests
-from collections import defaultdict
+import requests_cache
+import ijson
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
+from email.utils import parsedate_to_datetime
+from operator import itemgetter
 import logging
+import threading
 import time
+import unicodedata
 from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.util.retry import Retry
 import csv
+import io
 import os
+import shelve
+try:
+    import orjson
+except ImportError:  # fall back to the stdlib parser, which also accepts bytes
+    import json as orjson
 from pathlib import Path
-from typing import Dict, List, Set, Tuple
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
 # Set up logging
 logging.basicConfig(
@@ -17,32 +31,75 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-class RateLimiter:
-    def __init__(self, min_delay: float = 1.0):
-        self.last_request_time = 0
-        self.min_delay = min_delay
+# Release-group secondary types that disqualify a release from the album catalog
+_EXCLUDE_SECONDARY = frozenset(("live", "compilation", "soundtrack", "remix"))
+
+# Release pages fetched ahead of the consumer once the release count is known
+PREFETCH_PAGES = 2
+
+# Attempts at a release page before iter_releases gives up on it
+MAX_PAGE_ATTEMPTS = 5
+
+# Output files are written through a 1 MiB buffer instead of the 8 KiB default
+OUTPUT_BUFFER_SIZE = 1 << 20
+
+# Artist name -> MusicBrainz ID, persisted across runs and mirrored in memory
+ARTIST_ID_SHELF = Path("data") / "artist_ids.db"
+_artist_ids: Dict[str, str] = {}
+
+class TokenBucket:
+    """Token-bucket rate limiter: lets a request through immediately when a
+    token is available and otherwise sleeps just long enough for one to refill."""
+    def __init__(self, capacity: float = 1.0, rate: float = 1.0):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+        self._lock = threading.Lock()
     
-    def wait_if_needed(self):
-        current_time = time.time()
-        time_since_last_request = current_time - self.last_request_time
-        if time_since_last_request < self.min_delay:
-            sleep_time = self.min_delay - time_since_last_request
-            time.sleep(sleep_time)
-        self.last_request_time = time.time()
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+    
+    def acquire(self):
+        with self._lock:
+            self._refill()
+            if self.tokens < 1:
+                time.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+    
+    def penalize(self, delay: float):
+        """Push the next available token out by `delay` seconds (e.g. Retry-After)"""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.tokens, 1 - delay * self.rate)
 
 class MusicBrainzAPI:
     def __init__(self, app_name: str, version: str, contact: str):
         self.base_url = "https://musicbrainz.org/ws/2"
         self.user_agent = f"{app_name}/{version} ( {contact} )"
-        self.rate_limiter = RateLimiter(min_delay=1.1)
+        self.rate_limiter = TokenBucket(capacity=1, rate=1.0)
+        self.max_throttle_retries = 5
         
+        # 429/503 are handled in make_request so that Retry-After feeds the token bucket
         retry_strategy = Retry(
             total=5,
             backoff_factor=2,
-            status_forcelist=[429, 500, 502, 503, 504],
+            status_forcelist=[500, 502, 504],
         )
         
-        self.session = requests.Session()
+        # Responses are cached on disk so repeated runs don't spend the API quota.
+        # Expired entries keep their ETag, so refreshing them is a conditional GET
+        # (If-None-Match) that the server can answer with an empty 304.
+        self.session = requests_cache.CachedSession(
+            "mb_cache",
+            backend="sqlite",
+            expire_after=86400,
+            allowable_methods=("GET",),
+            cache_control=True
+        )
         self.session.mount("https://", HTTPAdapter(max_retries=retry_strategy))
         self.headers = {"User-Agent": self.user_agent, "Accept": "application/json"}
         
@@ -50,37 +107,100 @@ class MusicBrainzAPI:
         if params is None:
             params = {}
         params["fmt"] = "json"
-        self.rate_limiter.wait_if_needed()
         
         url = f"{self.base_url}/{endpoint}"
         try:
             logger.info(f"Making request to: {url}")
             logger.info(f"With parameters: {params}")
             
-            response = self.session.get(
-                url,
-                headers=self.headers,
-                params=params,
-                timeout=30
-            )
+            # Cache hits skip the rate limiter entirely
+            response = self.get_cached(url, params)
+            if response is not None:
+                return response
+            
+            for attempt in range(self.max_throttle_retries + 1):
+                self.rate_limiter.acquire()
+                response = self.session.get(
+                    url,
+                    headers=self.headers,
+                    params=params,
+                    timeout=30
+                )
+                if response.status_code not in (429, 503) or attempt == self.max_throttle_retries:
+                    break
+                retry_after = self.parse_retry_after(response.headers.get("Retry-After"))
+                logger.warning(f"Throttled ({response.status_code}), retrying in {retry_after:.1f}s")
+                self.rate_limiter.penalize(retry_after)
             response.raise_for_status()
+            if getattr(response, "revalidated", False):
+                logger.info(f"Not modified since last fetch, reusing cached body: {url}")
             return response
         except requests.exceptions.RequestException as e:
             logger.error(f"Request failed for endpoint {endpoint}: {str(e)}")
             raise
 
+    def get_cached(self, url: str, params: Dict) -> Optional[requests.Response]:
+        """Return the fresh cached response for a GET, or None, without touching the network.
+        Expired entries return None so the normal request path can revalidate them."""
+        request = self.session.prepare_request(requests.Request("GET", url, params=params, headers=self.headers))
+        response = self.session.cache.get_response(self.session.cache.create_key(request))
+        if response is None or response.is_expired:
+            return None
+        return response
+
+    @staticmethod
+    def parse_retry_after(value: str, default: float = 1.0) -> float:
+        """Parse a Retry-After header given either as seconds or an HTTP date"""
+        if not value:
+            return default
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+            return max((retry_at - datetime.now(retry_at.tzinfo)).total_seconds(), 0.0)
+        except (TypeError, ValueError):
+            return default
+
+def artist_key(artist_name: str) -> str:
+    """Normalized artist name used as the ID cache key"""
+    return unicodedata.normalize("NFKC", artist_name).casefold().strip()
+
+def resolve_artist_id(api: MusicBrainzAPI, artist_name: str) -> str:
+    """Look up an artist's MusicBrainz ID, checking the in-process and on-disk caches
+    before spending a rate-limited request. Both are keyed on the normalized name only,
+    so they are shared by every API instance. Failed lookups are not cached."""
+    key = artist_key(artist_name)
+    artist_id = _artist_ids.get(key)
+    if artist_id is not None:
+        return artist_id
+    
+    ARTIST_ID_SHELF.parent.mkdir(exist_ok=True)
+    with shelve.open(str(ARTIST_ID_SHELF)) as shelf:
+        artist_id = shelf.get(key)
+    
+    if artist_id is None:
+        response = api.make_request("artist", params={"query": artist_name})
+        artists = orjson.loads(response.content).get("artists", [])
+        if not artists:
+            raise ValueError(f"No artist found for name: {artist_name}")
+        
+        artist_id = artists[0]["id"]
+        with shelve.open(str(ARTIST_ID_SHELF)) as shelf:
+            shelf[key] = artist_id
+    
+    _artist_ids[key] = artist_id
+    return artist_id
+
 class AlbumCatalogCollector:
     def __init__(self, app_name: str, version: str, contact: str, year_range: Tuple[int, int] = None):
         self.api = MusicBrainzAPI(app_name, version, contact)
-        self.albums: Dict[str, dict] = {}
+        self.seen_album_ids: Set[str] = set()
         self.year_range = year_range
         
     def get_artist_id(self, artist_name: str) -> str:
-        response = self.api.make_request("artist", params={"query": artist_name})
-        artists = response.json().get("artists", [])
-        if not artists:
-            raise ValueError(f"No artist found for name: {artist_name}")
-        return artists[0]["id"]
+        return resolve_artist_id(self.api, artist_name)
     
     def parse_year(self, date_str: str) -> Tuple[bool, int]:
         """Parse year from date string, return (success, year)"""
@@ -98,30 +218,30 @@ class AlbumCatalogCollector:
         valid_year, year = self.parse_year(release_date)
         
         # Debug logging
-        logger.debug(f"Checking release: {release.get('title')} ({release_date})")
+        logger.debug("Checking release: %s (%s)", release.get("title"), release_date)
         
         if not valid_year:
-            logger.debug(f"Invalid year format: {release_date}")
+            logger.debug("Invalid year format: %s", release_date)
             return False, 0
             
         if self.year_range and not (self.year_range[0] <= year <= self.year_range[1]):
-            logger.debug(f"Year {year} outside range {self.year_range}")
+            logger.debug("Year %s outside range %s", year, self.year_range)
             return False, year
             
         release_group = release.get("release-group", {})
-        secondary_types = [t.lower() for t in release_group.get("secondary-types", [])]
+        secondary_types = {t.lower() for t in release_group.get("secondary-types", ())}
         primary_type = release_group.get("primary-type", "").lower()
         
-        logger.debug(f"Release type: {primary_type}, Secondary types: {secondary_types}")
+        logger.debug("Release type: %s, Secondary types: %s", primary_type, secondary_types)
         
         # Exclude live, compilation, and soundtrack releases
-        if any(t in secondary_types for t in ["live", "compilation", "soundtrack", "remix"]):
-            logger.debug(f"Excluded due to secondary type: {secondary_types}")
+        if secondary_types & _EXCLUDE_SECONDARY:
+            logger.debug("Excluded due to secondary type: %s", secondary_types)
             return False, year
             
         # Accept albums and ensure it has tracks
         if primary_type != "album":
-            logger.debug(f"Not an album: {primary_type}")
+            logger.debug("Not an album: %s", primary_type)
             return False, year
             
         # Check if it has media/tracks
@@ -130,154 +250,239 @@ class AlbumCatalogCollector:
             logger.debug("No tracks found in release")
             return False, year
             
-        logger.info(f"Valid album found: {release.get('title')} ({release_date})")
+        logger.info("Valid album found: %s (%s)", release.get("title"), release_date)
         return True, year
 
-    def collect_albums(self, artist_name: str) -> Dict[str, List[dict]]:
-        """Collect all albums and their track listings"""
-        artist_id = self.get_artist_id(artist_name)
-        logger.info(f"Found artist ID: {artist_id} for {artist_name}")
-        
-        albums_by_year = defaultdict(list)
+    def iter_releases(self, artist_id: str, status: Optional[str] = "official",
+                      release_type: Optional[str] = "album") -> Iterator[dict]:
+        """Page through an artist's releases and yield each raw release dict once.
+        status and release_type are filtered server-side; pass None to browse everything."""
         total_releases = 0
+        release_count = None
         offset = 0
         limit = 100
+        # release-groups is still needed for the secondary-type checks in is_valid_album
+        params = {
+            "artist": artist_id,
+            "limit": limit,
+            "inc": "recordings+release-groups"
+        }
+        if status:
+            params["status"] = status
+        if release_type:
+            params["type"] = release_type
         
+        failed_attempts = 0
         while True:
             try:
                 logger.info(f"Fetching releases batch (offset: {offset})")
-                response = self.api.make_request(
-                    "release",
-                    params={
-                        "artist": artist_id,
-                        "offset": offset,
-                        "limit": limit,
-                        "status": "official",
-                        "inc": "recordings+release-groups+media"
-                    }
-                )
-                
-                response_data = response.json()
-                releases = response_data.get("releases", [])
-                if not releases:
-                    break
-                
-                total_releases += len(releases)
-                logger.info(f"Processing batch of {len(releases)} releases (total: {total_releases})")
-                logger.info(f"Release count in response: {response_data.get('release-count', 'unknown')}")
-                
-                # Log details of first few releases for debugging
-                for idx, release in enumerate(releases[:5]):
-                    logger.info(f"Release {idx + 1}:")
-                    logger.info(f"  Title: {release.get('title')}")
-                    logger.info(f"  Date: {release.get('date')}")
-                    logger.info(f"  ID: {release.get('id')}")
-                    logger.info(f"  Type: {release.get('release-group', {}).get('primary-type')}")
-                    logger.info(f"  Secondary types: {release.get('release-group', {}).get('secondary-types', [])}")
-                
-                for release in releases:
-                    is_valid, year = self.is_valid_album(release)
-                    if not is_valid:
-                        continue
-                        
-                    album_id = release["id"]
-                    if album_id in self.albums:
-                        continue
-                        
-                    tracks = []
-                    for medium in release.get("media", []):
-                        disc_number = medium.get("position", 1)
-                        for track in medium.get("tracks", []):
-                            recording = track.get("recording", {})
-                            if not recording:
-                                continue
-                                
-                            track_data = {
-                                "disc_number": disc_number,
-                                "track_number": track.get("position", 0),
-                                "title": recording.get("title", track.get("title", "")).strip(),
-                                "length_seconds": recording.get("length", 0) // 1000 if recording.get("length") else None
-                            }
-                            tracks.append(track_data)
-                    
-                    album_data = {
-                        "album_id": album_id,
-                        "title": release.get("title", ""),
-                        "release_date": release.get("date", ""),
-                        "year": year,
-                        "tracks": sorted(tracks, key=lambda x: (x["disc_number"], x["track_number"]))
-                    }
-                    
-                    self.albums[album_id] = album_data
-                    albums_by_year[str(year)].append(album_data)
-                
-                if len(releases) < limit:
-                    break
-                    
-                offset += limit
-                time.sleep(1.5)  # Rate limiting between batches
-                
+                response = self.api.make_request("release", params={**params, "offset": offset})
             except requests.exceptions.RequestException as e:
+                failed_attempts += 1
+                if failed_attempts >= MAX_PAGE_ATTEMPTS:
+                    raise
                 logger.error(f"Error during batch retrieval: {str(e)}")
                 time.sleep(5)
                 continue
+            
+            # The cache reads every body in full, so releases are decoded one at a time
+            # from the downloaded page rather than from the socket
+            page_size = 0
+            page_meta = {}
+            with response:
+                try:
+                    events = _capture_top_level(ijson.parse(io.BytesIO(response.content), use_float=True), page_meta)
+                    for release in ijson.items(events, "releases.item"):
+                        if release_count is None:
+                            # release-count precedes the releases array in the page
+                            release_count = page_meta.get("release-count")
+                            logger.info(f"Release count in response: {release_count if release_count is not None else 'unknown'}")
+                        
+                        # Log details of first few releases for debugging
+                        if page_size < 5:
+                            release_group = release.get("release-group", {})
+                            logger.info("Release %d:", page_size + 1)
+                            logger.info("  Title: %s", release.get("title"))
+                            logger.info("  Date: %s", release.get("date"))
+                            logger.info("  ID: %s", release.get("id"))
+                            logger.info("  Type: %s", release_group.get("primary-type"))
+                            logger.info("  Secondary types: %s", release_group.get("secondary-types", []))
+                        
+                        page_size += 1
+                        yield release
+                except ijson.JSONError as e:
+                    # Resume after the releases that were already yielded
+                    failed_attempts += 1
+                    if failed_attempts >= MAX_PAGE_ATTEMPTS:
+                        raise
+                    logger.error(f"Error while reading releases batch: {str(e)}")
+                    total_releases += page_size
+                    offset += page_size
+                    time.sleep(5)
+                    continue
+            
+            failed_attempts = 0
+            if not page_size:
+                break
+            
+            total_releases += page_size
+            logger.info(f"Processed batch of {page_size} releases (total: {total_releases})")
+            
+            # The first page's release-count tells us when the last page has been read
+            if page_size < limit or (release_count is not None and total_releases >= release_count):
+                break
                 
+            offset += page_size
+            
+            if release_count is not None:
+                # The remaining offsets are known now, so fetch them ahead of the consumer
+                for releases in self._prefetch_release_pages(params, range(offset, release_count, limit)):
+                    total_releases += len(releases)
+                    logger.info(f"Processed batch of {len(releases)} releases (total: {total_releases})")
+                    yield from releases
+                break
+        
         logger.info(f"Processed {total_releases} total releases")
-        return albums_by_year
 
-def save_albums_to_csv(albums_by_year: Dict[str, List[dict]], artist_name: str, year_range: Tuple[int, int]):
-    """Save albums and tracks to CSV files in the data directory"""
+    def _fetch_release_page(self, params: Dict, offset: int) -> List[dict]:
+        """Fetch and decode one page of releases, retrying request and decode errors
+        up to MAX_PAGE_ATTEMPTS times before re-raising the last one"""
+        for attempt in range(1, MAX_PAGE_ATTEMPTS + 1):
+            try:
+                logger.info(f"Fetching releases batch (offset: {offset})")
+                response = self.api.make_request("release", params={**params, "offset": offset})
+                return orjson.loads(response.content).get("releases", [])
+            except (requests.exceptions.RequestException, ValueError) as e:
+                if attempt == MAX_PAGE_ATTEMPTS:
+                    raise
+                logger.error(f"Error during batch retrieval: {str(e)}")
+                time.sleep(5)
+
+    def _prefetch_release_pages(self, params: Dict, offsets: range) -> Iterator[List[dict]]:
+        """Yield release pages in offset order while later pages are fetched and decoded
+        in worker threads. The shared token bucket still paces the requests."""
+        with ThreadPoolExecutor(max_workers=PREFETCH_PAGES) as pool:
+            pending = deque()
+            for offset in offsets:
+                pending.append(pool.submit(self._fetch_release_page, params, offset))
+                if len(pending) >= PREFETCH_PAGES:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def validate_and_emit_album_rows(self, release: dict, album_writer, track_writer,
+                                     counts_by_year: Dict[int, Dict[str, int]]) -> bool:
+        """Write a release and its tracks if it is a valid, not yet seen album.
+        Updates counts_by_year and returns whether anything was written."""
+        is_valid, year = self.is_valid_album(release)
+        if not is_valid:
+            return False
+            
+        album_id = release["id"]
+        if album_id in self.seen_album_ids:
+            return False
+        self.seen_album_ids.add(album_id)
+            
+        # MusicBrainz lists media and tracks in order, so rows are built directly
+        # and only sorted if a position ever goes backwards
+        album_title = release.get("title", "")
+        track_rows = []
+        add_row = track_rows.append
+        in_order = True
+        last_position = (0, 0)
+        for medium in release.get("media", []):
+            disc_number = medium.get("position", 1)
+            for track in medium.get("tracks", []):
+                recording = track.get("recording", {})
+                if not recording:
+                    continue
+                
+                position = (disc_number, track.get("position", 0))
+                if position < last_position:
+                    in_order = False
+                last_position = position
+                
+                length = recording.get("length")
+                add_row((
+                    album_id,
+                    album_title,
+                    disc_number,
+                    position[1],
+                    recording.get("title", track.get("title", "")).strip(),
+                    length // 1000 if length else None
+                ))
+        
+        if not in_order:
+            track_rows.sort(key=itemgetter(2, 3))
+        track_writer.writerows(track_rows)
+        n_tracks = len(track_rows)
+        album_writer.writerow((album_id, album_title, release.get("date", ""), year, n_tracks))
+        
+        year_counts = counts_by_year[year]
+        year_counts["albums"] += 1
+        year_counts["tracks"] += n_tracks
+        return True
+
+    def collect_albums(self, artist_id: str, album_writer, track_writer) -> Dict[int, Dict[str, int]]:
+        """Collect all albums and stream them with their track listings to the given writers.
+        Returns album and track counts per year."""
+        counts_by_year = new_year_counts()
+        emit_album_rows = self.validate_and_emit_album_rows
+        for release in self.iter_releases(artist_id):
+            emit_album_rows(release, album_writer, track_writer, counts_by_year)
+        return counts_by_year
+
+def _capture_top_level(events: Iterator[tuple], meta: dict) -> Iterator[tuple]:
+    """Pass ijson parse events through, recording top-level scalars such as release-count"""
+    for prefix, event, value in events:
+        if prefix and "." not in prefix and event in ("number", "string"):
+            meta[prefix] = value
+        yield prefix, event, value
+
+def new_year_counts() -> Dict[int, Dict[str, int]]:
+    """Per-year album and track counters filled in by validate_and_emit_album_rows"""
+    return defaultdict(lambda: {"albums": 0, "tracks": 0})
+
+@contextmanager
+def album_csv_writers(artist_name: str, year_range: Tuple[int, int]):
+    """Open the album and track CSV files in the data directory and yield a writer for each.
+    Rows are positional and follow the fieldname order written as the header. Rows go to
+    temporary files that replace the previous CSVs only once the block completes, so a
+    failed run leaves the last good catalog in place."""
     data_dir = Path("data")
     data_dir.mkdir(exist_ok=True)
     
     artist_slug = artist_name.lower().replace(" ", "_")
     year_range_str = f"{year_range[0]}_{year_range[1]}" if year_range else "all"
     
-    # Save albums file
+    # Albums file
     albums_filename = data_dir / f"{artist_slug}_albums_{year_range_str}.csv"
     album_fieldnames = ["album_id", "title", "release_date", "year", "total_tracks"]
     
-    # Save tracks file
+    # Tracks file
     tracks_filename = data_dir / f"{artist_slug}_album_tracks_{year_range_str}.csv"
     track_fieldnames = ["album_id", "album_title", "disc_number", "track_number", "title", "length_seconds"]
     
-    # Write albums
-    with open(albums_filename, 'w', newline='', encoding='utf-8') as albumfile:
-        album_writer = csv.DictWriter(albumfile, fieldnames=album_fieldnames)
-        album_writer.writeheader()
-        
-        # Write tracks
-        with open(tracks_filename, 'w', newline='', encoding='utf-8') as trackfile:
-            track_writer = csv.DictWriter(trackfile, fieldnames=track_fieldnames)
-            track_writer.writeheader()
+    albums_tmp = albums_filename.with_name(albums_filename.name + ".tmp")
+    tracks_tmp = tracks_filename.with_name(tracks_filename.name + ".tmp")
+    try:
+        with open(albums_tmp, 'w', newline='', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE) as albumfile, \
+             open(tracks_tmp, 'w', newline='', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE) as trackfile:
+            album_writer = csv.writer(albumfile)
+            album_writer.writerow(album_fieldnames)
+            track_writer = csv.writer(trackfile)
+            track_writer.writerow(track_fieldnames)
             
-            for year in sorted(albums_by_year.keys()):
-                for album in sorted(albums_by_year[year], key=lambda x: x["release_date"]):
-                    # Write album entry
-                    album_row = {
-                        "album_id": album["album_id"],
-                        "title": album["title"],
-                        "release_date": album["release_date"],
-                        "year": album["year"],
-                        "total_tracks": len(album["tracks"])
-                    }
-                    album_writer.writerow(album_row)
-                    
-                    # Write track entries
-                    for track in album["tracks"]:
-                        track_row = {
-                            "album_id": album["album_id"],
-                            "album_title": album["title"],
-                            "disc_number": track["disc_number"],
-                            "track_number": track["track_number"],
-                            "title": track["title"],
-                            "length_seconds": track["length_seconds"]
-                        }
-                        track_writer.writerow(track_row)
+            yield album_writer, track_writer
+    except BaseException:
+        for tmp in (albums_tmp, tracks_tmp):
+            tmp.unlink(missing_ok=True)
+        raise
     
+    os.replace(albums_tmp, albums_filename)
+    os.replace(tracks_tmp, tracks_filename)
     logger.info(f"Album data saved to: {albums_filename}")
     logger.info(f"Track data saved to: {tracks_filename}")
-    return albums_filename, tracks_filename
 
 def collect_artist_albums(artist_name: str, year_range: Tuple[int, int] = None):
     """Main function to collect an artist's album catalog"""
@@ -292,23 +497,24 @@ def collect_artist_albums(artist_name: str, year_range: Tuple[int, int] = None):
         logger.info(f"Starting album collection for {artist_name}" + 
                    (f" ({year_range[0]}-{year_range[1]})" if year_range else ""))
         
-        albums_by_year = collector.collect_albums(artist_name)
+        # Resolve the artist before touching the output files, so an unknown artist
+        # leaves any previous catalog alone
+        artist_id = collector.get_artist_id(artist_name)
+        logger.info(f"Found artist ID: {artist_id} for {artist_name}")
+        
+        # Albums are written as they arrive, so CSV rows follow MusicBrainz order
+        with album_csv_writers(artist_name, year_range) as (album_writer, track_writer):
+            counts_by_year = collector.collect_albums(artist_id, album_writer, track_writer)
         
-        # Print summary before saving
-        total_albums = sum(len(albums) for albums in albums_by_year.values())
-        total_tracks = sum(len(album["tracks"]) for year_albums in albums_by_year.values() 
-                         for album in year_albums)
+        # Print summary
+        total_albums = sum(counts["albums"] for counts in counts_by_year.values())
+        total_tracks = sum(counts["tracks"] for counts in counts_by_year.values())
         
         logger.info(f"Found {total_albums} total albums with {total_tracks} tracks")
         
-        for year in sorted(albums_by_year.keys()):
-            albums = albums_by_year[year]
-            track_count = sum(len(album["tracks"]) for album in albums)
-            logger.info(f"Year {year}: {len(albums)} albums, {track_count} tracks")
-            
-        album_file, track_file = save_albums_to_csv(albums_by_year, artist_name, year_range)
-        logger.info(f"Album data saved to: {album_file}")
-        logger.info(f"Track data saved to: {track_file}")
+        for year in sorted(counts_by_year):
+            counts = counts_by_year[year]
+            logger.info(f"Year {year}: {counts['albums']} albums, {counts['tracks']} tracks")
         
     except Exception as e:
         logger.error(f"Failed to process {artist_name}: {str(e)}")
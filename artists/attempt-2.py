@@ -1,67 +1,162 @@
-import musicbrainzngs
-from typing import List, Dict
+import aiohttp
+import asyncio
+from collections import defaultdict
+from typing import List, Dict, Optional, Tuple
 import time
 from datetime import datetime
+from email.utils import parsedate_to_datetime
 import csv
+try:
+    import orjson
+except ImportError:  # fall back to the stdlib parser, which also accepts bytes
+    import json as orjson
 
 # Set up MusicBrainz API
-musicbrainzngs.set_useragent(
-    "AlbumRetriever",
-    "1.0",
-    "your-email@example.com"  # Replace with your email
-)
+BASE_URL = "https://musicbrainz.org/ws/2"
+HEADERS = {
+    "User-Agent": "AlbumRetriever/1.0 ( your-email@example.com )",
+    "Accept": "application/json"
+}
+# MusicBrainz allows one request per second per client
+MAX_CONCURRENT_REQUESTS = 1
+RELEASES_PAGE_SIZE = 100
+# Artist IDs OR-ed into a single release search; keeps the Lucene query a sane length
+ARTISTS_PER_QUERY = 25
+# Throttled (429/503) responses are retried this many times before the error is raised
+MAX_THROTTLE_RETRIES = 5
 
-def get_artist_id(artist_name: str) -> str:
+class TokenBucket:
+    """Token-bucket rate limiter shared by every task in the batch."""
+    def __init__(self, capacity: float = 1.0, rate: float = 1.0):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+    
+    async def acquire_async(self):
+        self._refill()
+        if self.tokens < 1:
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+            self._refill()
+        self.tokens -= 1
+    
+    def penalize(self, delay: float):
+        """Push the next available token out by `delay` seconds (e.g. Retry-After)"""
+        self._refill()
+        self.tokens = min(self.tokens, 1 - delay * self.rate)
+
+def parse_retry_after(value: Optional[str], default: float = 1.0) -> float:
+    """Parse a Retry-After header given either as seconds or an HTTP date"""
+    if not value:
+        return default
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max((retry_at - datetime.now(retry_at.tzinfo)).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return default
+
+def release_to_album(release: Dict, artist_name: str) -> Optional[Dict]:
+    """Build an album row from a release, or None for compilations and live albums."""
+    secondary_types = {t.lower() for t in release.get('release-group', {}).get('secondary-types', [])}
+    if 'compilation' in secondary_types or 'live' in secondary_types:
+        return None
+    
+    return {
+        'artist': artist_name,
+        'title': release['title'],
+        'date': normalize_release_date(release.get('date', 'Unknown')),
+        'id': release['id']
+    }
+
+def sort_albums(albums: List[Dict]) -> List[Dict]:
+    """Sort albums by release date, unknown dates last."""
+    albums.sort(key=lambda x: x['date'] if x['date'] != 'Unknown' else '9999')
+    return albums
+
+def normalize_release_date(release_date: str) -> str:
+    """Convert a MusicBrainz date to a consistent format, leaving unknown ones as-is."""
+    if release_date != 'Unknown':
+        try:
+            # Convert date to consistent format
+            date_obj = datetime.strptime(release_date, '%Y-%m-%d')
+            release_date = date_obj.strftime('%Y-%m-%d')
+        except ValueError:
+            try:
+                # Try just the year if full date isn't available
+                date_obj = datetime.strptime(release_date, '%Y')
+                release_date = date_obj.strftime('%Y')
+            except ValueError:
+                pass
+    return release_date
+
+async def fetch_json(session: aiohttp.ClientSession, bucket: TokenBucket,
+                     semaphore: asyncio.Semaphore, endpoint: str, params: Dict) -> Dict:
+    """GET a MusicBrainz JSON endpoint, gated by the shared semaphore and token bucket.
+    Throttled responses are retried, with Retry-After pushing back the shared bucket."""
+    params = {**params, 'fmt': 'json'}
+    async with semaphore:
+        for attempt in range(MAX_THROTTLE_RETRIES + 1):
+            await bucket.acquire_async()
+            async with session.get(f"{BASE_URL}/{endpoint}", params=params) as response:
+                if response.status in (429, 503) and attempt < MAX_THROTTLE_RETRIES:
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                    print(f"Throttled ({response.status}), retrying in {retry_after:.1f}s")
+                    bucket.penalize(retry_after)
+                    continue
+                response.raise_for_status()
+                return orjson.loads(await response.read())
+
+async def fetch_artist_id(session: aiohttp.ClientSession, bucket: TokenBucket,
+                          semaphore: asyncio.Semaphore, artist_name: str) -> str:
     """Search for an artist and return their MusicBrainz ID."""
-    result = musicbrainzngs.search_artists(artist=artist_name)
-    if result['artist-list']:
-        return result['artist-list'][0]['id']
+    data = await fetch_json(session, bucket, semaphore, 'artist', {'query': artist_name})
+    if data.get('artists'):
+        return data['artists'][0]['id']
     raise ValueError(f"Artist '{artist_name}' not found")
 
-def get_original_albums(artist_id: str, artist_name: str) -> List[Dict]:
+async def fetch_albums_for_artists(session: aiohttp.ClientSession, bucket: TokenBucket,
+                                   semaphore: asyncio.Semaphore,
+                                   artists: List[Tuple[str, str]]) -> List[List[Dict]]:
     """
-    Retrieve original albums (excluding compilations) for an artist.
-    Returns list of albums with release date and title.
+    Search the albums of several artists with one Lucene arid:(... OR ...) query.
+    artists holds (MusicBrainz artist ID, name used in the album rows) pairs; the albums
+    of each pair are returned in the same order. Like a per-artist browse, a release
+    counts for every requested artist in its credit, not just the first one, and two
+    names resolving to the same ID each get their own rows.
     """
-    # Get all releases for the artist
-    result = musicbrainzngs.browse_releases(
-        artist=artist_id,
-        release_type=['album']  # Only get albums
-    )
-    
-    albums = []
-    for release in result['release-list']:
-        # Skip compilations and live albums
-        if ('secondary-type-list' in release and 
-            ('compilation' in release['secondary-type-list'] or 
-             'live' in release['secondary-type-list'])):
-            continue
-            
-        # Get release date
-        release_date = release.get('date', 'Unknown')
-        if release_date != 'Unknown':
-            try:
-                # Convert date to consistent format
-                date_obj = datetime.strptime(release_date, '%Y-%m-%d')
-                release_date = date_obj.strftime('%Y-%m-%d')
-            except ValueError:
-                try:
-                    # Try just the year if full date isn't available
-                    date_obj = datetime.strptime(release_date, '%Y')
-                    release_date = date_obj.strftime('%Y')
-                except ValueError:
-                    pass
+    indexes_by_id = defaultdict(list)
+    for i, (artist_id, _) in enumerate(artists):
+        indexes_by_id[artist_id].append(i)
+    query = f"arid:({' OR '.join(indexes_by_id)}) AND primarytype:album"
+    albums = [[] for _ in artists]
+    offset = 0
+    while True:
+        data = await fetch_json(session, bucket, semaphore, 'release',
+                                {'query': query, 'limit': RELEASES_PAGE_SIZE, 'offset': offset})
+        releases = data.get('releases', [])
+        for release in releases:
+            credited = {credit.get('artist', {}).get('id') for credit in release.get('artist-credit', [])
+                        if isinstance(credit, dict)}
+            for artist_id in credited & indexes_by_id.keys():
+                for i in indexes_by_id[artist_id]:
+                    album = release_to_album(release, artists[i][1])
+                    if album:
+                        albums[i].append(album)
         
-        albums.append({
-            'artist': artist_name,
-            'title': release['title'],
-            'date': release_date,
-            'id': release['id']
-        })
+        offset += len(releases)
+        if not releases or offset >= data.get('count', 0):
+            break
     
-    # Sort albums by release date
-    albums.sort(key=lambda x: x['date'] if x['date'] != 'Unknown' else '9999')
-    return albums
+    return [sort_albums(artist_albums) for artist_albums in albums]
 
 def write_albums_to_csv(all_albums: List[Dict], filename: str = 'artist_albums.csv'):
     """Write albums data to CSV file."""
@@ -79,22 +174,44 @@ def write_albums_to_csv(all_albums: List[Dict], filename: str = 'artist_albums.c
     
     print(f"\nAlbums have been written to {filename}")
 
+async def _run(artists: List[str]) -> List:
+    bucket = TokenBucket(capacity=1, rate=1.0)
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    async with aiohttp.ClientSession(headers=HEADERS) as session:
+        print(f"\nLooking up {len(artists)} artists...")
+        artist_ids = await asyncio.gather(
+            *(fetch_artist_id(session, bucket, semaphore, artist) for artist in artists),
+            return_exceptions=True
+        )
+        # Results start as the lookup errors and are filled in per input position, so
+        # names that resolve to the same ID keep separate rows
+        results = list(artist_ids)
+        resolved = [i for i, artist_id in enumerate(artist_ids) if not isinstance(artist_id, Exception)]
+        
+        # One paginated search per batch of artists instead of one catalog per artist
+        batches = [resolved[i:i + ARTISTS_PER_QUERY] for i in range(0, len(resolved), ARTISTS_PER_QUERY)]
+        print(f"Retrieving albums in {len(batches)} batched queries...")
+        batch_results = await asyncio.gather(
+            *(fetch_albums_for_artists(session, bucket, semaphore, [(artist_ids[i], artists[i]) for i in batch])
+              for batch in batches),
+            return_exceptions=True
+        )
+        
+        for batch, batch_result in zip(batches, batch_results):
+            for position, i in enumerate(batch):
+                results[i] = batch_result if isinstance(batch_result, Exception) else batch_result[position]
+        
+        return results
+
 def process_artists(artists: List[str]) -> List[Dict]:
-    """Process multiple artists and return their albums."""
+    """Process multiple artists concurrently and return their albums."""
     all_albums = []
     
-    for artist in artists:
-        try:
-            print(f"\nRetrieving albums for {artist}...")
-            artist_id = get_artist_id(artist)
-            albums = get_original_albums(artist_id, artist)
-            all_albums.extend(albums)
-            
-        except Exception as e:
-            print(f"Error processing {artist}: {str(e)}")
-        
-        # Sleep to respect rate limiting
-        time.sleep(1)
+    for artist, result in zip(artists, asyncio.run(_run(artists))):
+        if isinstance(result, Exception):
+            print(f"Error processing {artist}: {str(result)}")
+            continue
+        all_albums.extend(result)
     
     return all_albums
 
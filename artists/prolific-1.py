@@ -1,15 +1,19 @@
-import requests
-from collections import defaultdict
+import ijson
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import asyncio
+import aiohttp
 import logging
-import time
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
+from operator import itemgetter
+import unicodedata
 import csv
 import os
 from pathlib import Path
 from typing import Dict, List, Set, Tuple
 
+from _mb import MusicBrainzAPI, resolve_artist_id
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -17,76 +21,37 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-class RateLimiter:
-    def __init__(self, min_delay: float = 1.0):
-        self.last_request_time = 0
-        self.min_delay = min_delay
-    
-    def wait_if_needed(self):
-        current_time = time.time()
-        time_since_last_request = current_time - self.last_request_time
-        if time_since_last_request < self.min_delay:
-            sleep_time = self.min_delay - time_since_last_request
-            time.sleep(sleep_time)
-        self.last_request_time = time.time()
+# Output files are written through a 1 MiB buffer so rows reach the OS in large chunks
+OUTPUT_BUFFER_SIZE = 1 << 20
 
-class MusicBrainzAPI:
-    def __init__(self, app_name: str, version: str, contact: str):
-        self.base_url = "https://musicbrainz.org/ws/2"
-        self.user_agent = f"{app_name}/{version} ( {contact} )"
-        self.rate_limiter = RateLimiter(min_delay=1.1)
-        
-        retry_strategy = Retry(
-            total=5,
-            backoff_factor=2,
-            status_forcelist=[429, 500, 502, 503, 504],
-        )
-        
-        self.session = requests.Session()
-        self.session.mount("https://", HTTPAdapter(max_retries=retry_strategy))
-        self.headers = {"User-Agent": self.user_agent, "Accept": "application/json"}
-        
-    def make_request(self, endpoint: str, params: Dict = None) -> requests.Response:
-        if params is None:
-            params = {}
-        params["fmt"] = "json"
-        self.rate_limiter.wait_if_needed()
-        
-        try:
-            response = self.session.get(
-                f"{self.base_url}/{endpoint}",
-                headers=self.headers,
-                params=params,
-                timeout=30
-            )
-            response.raise_for_status()
-            return response
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Request failed for endpoint {endpoint}: {str(e)}")
-            raise
+# MusicBrainz type names are a small fixed set, so they are matched case-exact
+# instead of lowercasing them for every release
+_PRIMARY_TYPES = {"Album": "album", "Single": "single", "EP": "ep"}
+_EXCLUDED_SECONDARY = frozenset(("Live", "Compilation", "Soundtrack"))
 
 class MusicCatalogCollector:
-    def __init__(self, app_name: str, version: str, contact: str, year_range: Tuple[int, int] = None):
-        self.api = MusicBrainzAPI(app_name, version, contact)
+    def __init__(self, app_name: str, version: str, contact: str, year_range: Tuple[int, int] = None,
+                 api: MusicBrainzAPI = None):
+        self.api = api or MusicBrainzAPI(app_name, version, contact)
         self.unique_songs: Dict[str, dict] = {}
         self.year_range = year_range
         
     def get_artist_id(self, artist_name: str) -> str:
-        response = self.api.make_request("artist", params={"query": artist_name})
-        artists = response.json().get("artists", [])
-        if not artists:
-            raise ValueError(f"No artist found for name: {artist_name}")
-        return artists[0]["id"]
+        return resolve_artist_id(self.api, unicodedata.normalize("NFKC", artist_name).casefold().strip())
     
     def parse_year(self, date_str: str) -> Tuple[bool, int]:
         """Parse year from date string, return (success, year)"""
-        if not date_str:
+        # Dates are ISO (YYYY[-MM[-DD]]), so read the four year digits directly
+        # instead of going through int() and its exception path for bad dates
+        if len(date_str) < 4:
             return False, 0
-        try:
-            year = int(date_str[:4])
-            return True, year
-        except (ValueError, IndexError):
+        d0 = ord(date_str[0]) - 48
+        d1 = ord(date_str[1]) - 48
+        d2 = ord(date_str[2]) - 48
+        d3 = ord(date_str[3]) - 48
+        if not (0 <= d0 <= 9 and 0 <= d1 <= 9 and 0 <= d2 <= 9 and 0 <= d3 <= 9):
             return False, 0
+        return True, d0 * 1000 + d1 * 100 + d2 * 10 + d3
     
     def is_valid_release(self, release: dict) -> Tuple[bool, int]:
         """Check if release meets criteria and return (is_valid, year)"""
@@ -99,114 +64,177 @@ class MusicCatalogCollector:
             return False, year
             
         release_group = release.get("release-group", {})
-        secondary_types = [t.lower() for t in release_group.get("secondary-types", [])]
         
         # Only exclude live, compilation, and soundtrack releases
-        if any(t in secondary_types for t in ["live", "compilation", "soundtrack"]):
+        if not _EXCLUDED_SECONDARY.isdisjoint(release_group.get("secondary-types", ())):
             return False, year
             
         # Accept both albums and singles
-        primary_type = release_group.get("primary-type", "").lower()
-        if primary_type not in ["album", "single", "ep"]:
+        primary_type = _PRIMARY_TYPES.get(release_group.get("primary-type"))
+        if primary_type is None:
             return False, year
             
         logger.info(f"Processing {primary_type}: {release.get('title', '')}")
         return True, year
 
-    def collect_tracks(self, artist_name: str) -> Dict[str, List[dict]]:
-        """Collect all tracks and organize by year"""
+    def collect_tracks(self, artist_name: str) -> Dict[str, dict]:
+        """Collect all tracks, keyed by song title"""
         artist_id = self.get_artist_id(artist_name)
         logger.info(f"Found artist ID: {artist_id} for {artist_name}")
         
-        tracks_by_year = defaultdict(list)
         total_releases = 0
-        offset = 0
-        limit = 100
         
+        pages = asyncio.run(self.fetch_release_pages(artist_id))
+        
+        for releases in pages:
+            total_releases += len(releases)
+            logger.info(f"Processing batch of {len(releases)} releases (total: {total_releases})")
+            
+            for release in releases:
+                is_valid, _ = self.is_valid_release(release)
+                if not is_valid:
+                    continue
+
+                release_date = release.get("date", "")
+
+                for medium in release.get("media", []):
+                    for track in medium.get("tracks", []):
+                        recording = track.get("recording", {})
+                        if not recording:
+                            continue
+
+                        song_title = recording.get("title", track.get("title", "")).strip()
+
+                        release_group = release.get("release-group", {})
+                        is_album = release_group.get("primary-type") == "Album"
+
+                        # If it's an album track, we want to keep it regardless
+                        # If it's a single, only keep it if it's earlier than what we have
+                        if song_title in self.unique_songs:
+                            existing_track = self.unique_songs[song_title]
+                            existing_is_album = existing_track.get("release_type") == "Album Track"
+
+                            # Keep the album version if either:
+                            # 1. Current track is an album track and existing isn't
+                            # 2. Both are album tracks but current is earlier
+                            # 3. Neither are album tracks but current is earlier
+                            if (is_album and not existing_is_album) or \
+                               (is_album == existing_is_album and release_date < existing_track["release_date"]):
+                                pass  # We'll replace the existing track
+                            else:
+                                continue  # Keep the existing track
+
+                        album_name = release.get("title", "") if is_album else ""
+
+                        track_data = {
+                            "song_title": song_title,
+                            "release_date": release_date,
+                            "release_title": release.get("title", ""),
+                            "release_type": "Album Track" if is_album else "Single",
+                            "album_name": album_name if is_album else "",
+                            "length_seconds": recording.get("length", 0) // 1000 if recording.get("length") else None
+                        }
+
+                        self.unique_songs[song_title] = track_data
+        
+        logger.info(f"Processed {total_releases} total releases")
+        return self.unique_songs
+
+    def is_candidate_release_group(self, release_group: dict) -> bool:
+        """Pre-filter a release group before fetching its releases. Uses the same type
+        rules as is_valid_release; a group first released after the year range can't
+        contain a release inside it."""
+        if not _EXCLUDED_SECONDARY.isdisjoint(release_group.get("secondary-types", ())):
+            return False
+        
+        primary_type = _PRIMARY_TYPES.get(release_group.get("primary-type"))
+        if primary_type is None:
+            return False
+        
+        valid_year, year = self.parse_year(release_group.get("first-release-date", ""))
+        if not valid_year:
+            return False
+        return not (self.year_range and year > self.year_range[1])
+
+    async def fetch_page(self, session: aiohttp.ClientSession, endpoint: str, params: Dict, offset: int) -> dict:
         while True:
             try:
-                logger.info(f"Fetching releases batch (offset: {offset})")
-                response = self.api.make_request(
-                    "release",
-                    params={
-                        "artist": artist_id,
-                        "offset": offset,
-                        "limit": limit,
-                        "status": "official",
-                        "inc": "recordings+release-groups"
-                    }
-                )
-                
-                releases = response.json().get("releases", [])
-                if not releases:
-                    break
-                    
-                total_releases += len(releases)
-                logger.info(f"Processing batch of {len(releases)} releases (total: {total_releases})")
-                
-                for release in releases:
-                    is_valid, year = self.is_valid_release(release)
-                    if not is_valid:
-                        continue
-                        
-                    release_date = release.get("date", "")
-                    
-                    for medium in release.get("media", []):
-                        for track in medium.get("tracks", []):
-                            recording = track.get("recording", {})
-                            if not recording:
-                                continue
-                                
-                            song_title = recording.get("title", track.get("title", "")).strip()
-                            
-                            release_group = release.get("release-group", {})
-                            is_album = release_group.get("primary-type", "").lower() == "album"
-                            
-                            # If it's an album track, we want to keep it regardless
-                            # If it's a single, only keep it if it's earlier than what we have
-                            if song_title in self.unique_songs:
-                                existing_track = self.unique_songs[song_title]
-                                existing_is_album = existing_track.get("release_type") == "Album Track"
-                                
-                                # Keep the album version if either:
-                                # 1. Current track is an album track and existing isn't
-                                # 2. Both are album tracks but current is earlier
-                                # 3. Neither are album tracks but current is earlier
-                                if (is_album and not existing_is_album) or \
-                                   (is_album == existing_is_album and release_date < existing_track["release_date"]):
-                                    pass  # We'll replace the existing track
-                                else:
-                                    continue  # Keep the existing track
-                                    
-                            album_name = release.get("title", "") if is_album else ""
-                            
-                            track_data = {
-                                "song_title": song_title,
-                                "release_date": release_date,
-                                "release_title": release.get("title", ""),
-                                "release_type": "Album Track" if is_album else "Single",
-                                "album_name": album_name if is_album else "",
-                                "length_seconds": recording.get("length", 0) // 1000 if recording.get("length") else None
-                            }
-                            
-                            self.unique_songs[song_title] = track_data
-                            tracks_by_year[str(year)].append(track_data)
-                
-                if len(releases) < limit:
-                    break
-                    
-                offset += limit
-                time.sleep(1.5)  # Rate limiting between batches
-                
-            except requests.exceptions.RequestException as e:
+                logger.info(f"Fetching {endpoint} batch (offset: {offset})")
+                return await self.api.make_request_async(session, endpoint, {**params, "offset": offset})
+            except (aiohttp.ClientError, ijson.JSONError) as e:
                 logger.error(f"Error during batch retrieval: {str(e)}")
-                time.sleep(5)
-                continue
-                
-        logger.info(f"Processed {total_releases} total releases")
-        return tracks_by_year
+                await asyncio.sleep(5)
+
+    async def browse_all(self, session: aiohttp.ClientSession, endpoint: str, params: Dict) -> List[List[dict]]:
+        """Fetch every page of a browse or search request. The first page gives the total
+        count; the remaining pages are then requested concurrently, paced by the rate limiter."""
+        limit = params["limit"]
+        first_page = await self.fetch_page(session, endpoint, params, 0)
+        # Browse pages report "<entity>-count", search pages just "count"
+        count = first_page.get(f"{endpoint}-count", first_page.get("count", 0))
+        rest = await asyncio.gather(*(
+            self.fetch_page(session, endpoint, params, offset) for offset in range(limit, count, limit)
+        ))
+        return [page.get(f"{endpoint}s", []) for page in (first_page, *rest)]
+
+    def release_group_params(self, artist_id: str) -> Dict:
+        """Query for the artist's release groups. With a year range, a Lucene search
+        bounds the first release date on the server so groups that start after the
+        range are never paged through; otherwise every group is browsed."""
+        if not self.year_range:
+            return {"artist": artist_id, "type": "album|single|ep", "limit": 100}
+        return {
+            "query": f"arid:{artist_id} AND primarytype:(album OR single OR ep) "
+                     f"AND firstreleasedate:[* TO {self.year_range[1]}-12-31]",
+            "limit": 100
+        }
+
+    async def fetch_release_pages(self, artist_id: str) -> List[List[dict]]:
+        """Shortlist the artist's release groups, then fetch releases with recordings
+        for those groups only. Each release gets its group attached as "release-group"."""
+        async with self.api.open_async_session() as session:
+            group_pages = await self.browse_all(session, "release-group", self.release_group_params(artist_id))
+            release_groups = [rg for page in group_pages for rg in page if self.is_candidate_release_group(rg)]
+            logger.info(f"Fetching releases for {len(release_groups)} release groups")
+            
+            release_pages = await asyncio.gather(*(
+                self.browse_all(session, "release", {
+                    "release-group": rg["id"],
+                    "status": "official",
+                    "inc": "recordings",
+                    "limit": 100
+                })
+                for rg in release_groups
+            ))
+        
+        pages = []
+        for release_group, group_release_pages in zip(release_groups, release_pages):
+            for releases in group_release_pages:
+                for release in releases:
+                    release["release-group"] = release_group
+                pages.append(releases)
+        return pages
 
-def save_to_csv(tracks_by_year: Dict[str, List[dict]], artist_name: str, year_range: Tuple[int, int]):
+def read_existing_titles(filename: Path, titles_file: Path) -> Set[str]:
+    """Song titles already in the CSV, read from its sidecar titles file.
+    A CSV without a sidecar (written before it existed) is parsed once to create it."""
+    if not filename.exists():
+        return set()
+    if titles_file.exists():
+        # One title per "\n"; splitlines() would also break on \r, \x0b, \x85, \u2028
+        # and the like inside titles, and newline='' keeps \r from being translated
+        with open(titles_file, 'r', newline='', encoding='utf-8') as f:
+            titles = f.read().split("\n")
+        titles.pop()  # empty string after the final newline
+        return set(titles)
+    
+    with open(filename, 'r', newline='', encoding='utf-8') as csvfile:
+        titles = {row["song_title"] for row in csv.DictReader(csvfile)}
+    with open(titles_file, 'w', newline='', encoding='utf-8') as f:
+        f.writelines(title + "\n" for title in titles)
+    return titles
+
+def save_to_csv(unique_songs: Dict[str, dict], artist_name: str, year_range: Tuple[int, int]):
     """Save tracks to CSV file in the data directory"""
     # Create data directory if it doesn't exist
     data_dir = Path("data")
@@ -227,64 +255,86 @@ def save_to_csv(tracks_by_year: Dict[str, List[dict]], artist_name: str, year_ra
         "length_seconds"
     ]
     
-    # Read existing entries if file exists
-    existing_songs = set()
-    if filename.exists():
-        with open(filename, 'r', newline='', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            existing_songs = {row["song_title"] for row in reader}
+    # Titles already written, kept in a sidecar file so the CSV isn't re-parsed
+    titles_file = filename.with_name(filename.name + ".titles")
+    existing_songs = read_existing_titles(filename, titles_file)
     
     # Append new entries
     mode = 'a' if filename.exists() else 'w'
-    with open(filename, mode, newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+    known_songs = len(existing_songs)
+    with open(filename, mode, newline='', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE) as csvfile, \
+         open(titles_file, mode, newline='', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE) as titlesfile:
+        # Rows are positional, in fieldnames order
+        writer = csv.writer(csvfile)
         if mode == 'w':
-            writer.writeheader()
+            writer.writerow(fieldnames)
+        
+        def new_rows():
+            # Sorting by release date also groups the songs by year
+            for track in sorted(unique_songs.values(), key=itemgetter("release_date")):
+                song_title = track["song_title"]
+                if song_title in existing_songs:
+                    continue
+                existing_songs.add(song_title)
+                titlesfile.write(song_title + "\n")
+                yield (
+                    track["release_date"][:4],
+                    song_title,
+                    track["release_date"],
+                    track["release_title"],
+                    track["release_type"],
+                    track["album_name"],
+                    track["length_seconds"]
+                )
         
-        new_songs = 0
-        for year in sorted(tracks_by_year.keys()):
-            for track in sorted(tracks_by_year[year], key=lambda x: x["release_date"]):
-                if track["song_title"] not in existing_songs:
-                    row = track.copy()
-                    row["year"] = year
-                    writer.writerow(row)
-                    existing_songs.add(track["song_title"])
-                    new_songs += 1
+        writer.writerows(new_rows())
+    new_songs = len(existing_songs) - known_songs
     
     logger.info(f"Added {new_songs} new songs to {filename}")
     logger.info(f"Total unique songs in file: {len(existing_songs)}")
     return filename
 
-def collect_artist_catalog(artist_name: str, year_range: Tuple[int, int] = None):
+def collect_artist_catalog(artist_name: str, year_range: Tuple[int, int] = None, api: MusicBrainzAPI = None):
     """Main function to collect an artist's catalog"""
     collector = MusicCatalogCollector(
         app_name="MusicCatalogCollector",
         version="1.0.0",
         contact="your.email@example.com",
-        year_range=year_range
+        year_range=year_range,
+        api=api
     )
     
     try:
         logger.info(f"Starting collection for {artist_name}" + 
                    (f" ({year_range[0]}-{year_range[1]})" if year_range else ""))
         
-        tracks_by_year = collector.collect_tracks(artist_name)
+        unique_songs = collector.collect_tracks(artist_name)
         
         # Print summary before saving
-        total_tracks = sum(len(tracks) for tracks in tracks_by_year.values())
-        logger.info(f"Found {total_tracks} total unique tracks")
+        logger.info(f"Found {len(unique_songs)} total unique tracks")
         
-        for year in sorted(tracks_by_year.keys()):
-            track_count = len(tracks_by_year[year])
-            logger.info(f"Year {year}: {track_count} unique tracks")
+        tracks_per_year = Counter(track["release_date"][:4] for track in unique_songs.values())
+        for year in sorted(tracks_per_year.keys()):
+            logger.info(f"Year {year}: {tracks_per_year[year]} unique tracks")
             
-        output_file = save_to_csv(tracks_by_year, artist_name, year_range)
+        output_file = save_to_csv(unique_songs, artist_name, year_range)
         logger.info(f"Data saved to: {output_file}")
         
     except Exception as e:
         logger.error(f"Failed to process {artist_name}: {str(e)}")
         raise
 
+def collect_many(artist_names: List[str], year_range: Tuple[int, int] = None, max_workers: int = 4):
+    """Collect several artists' catalogs concurrently. The workers share one MusicBrainzAPI,
+    so pooled connections are reused and the rate limit holds across all of them."""
+    api = MusicBrainzAPI(
+        app_name="MusicCatalogCollector",
+        version="1.0.0",
+        contact="your.email@example.com"
+    )
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(lambda name: collect_artist_catalog(name, year_range, api), artist_names))
+
 if __name__ == "__main__":
     # Example usage
     artist_name = "The Beatles"  # Change this to any artist
@@ -1,62 +1,27 @@
-import requests
-from collections import defaultdict
+import ijson
+from collections import Counter
 from datetime import datetime
+import asyncio
+import aiohttp
 import logging
-import time
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
+from operator import itemgetter
+import unicodedata
 import csv
-from typing import Dict, List
+from typing import Dict, List, Optional, Set
+
+from _mb import MusicBrainzAPI, resolve_artist_id
 import os
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class RateLimiter:
-    def __init__(self):
-        self.last_request_time = 0
-    
-    def wait_if_needed(self):
-        current_time = time.time()
-        time_since_last_request = current_time - self.last_request_time
-        if time_since_last_request < 1.0:
-            time.sleep(1.0 - time_since_last_request)
-        self.last_request_time = time.time()
-
-class MusicBrainzAPI:
-    def __init__(self, app_name: str, version: str, contact: str):
-        self.base_url = "https://musicbrainz.org/ws/2"
-        self.user_agent = f"{app_name}/{version} ( {contact} )"
-        self.rate_limiter = RateLimiter()
-        
-        retry_strategy = Retry(
-            total=5,
-            backoff_factor=2,
-            status_forcelist=[429, 500, 502, 503, 504],
-        )
-        
-        self.session = requests.Session()
-        self.session.mount("https://", HTTPAdapter(max_retries=retry_strategy))
-        self.headers = {"User-Agent": self.user_agent, "Accept": "application/json"}
-        
-    def make_request(self, endpoint: str, params: Dict = None) -> requests.Response:
-        if params is None:
-            params = {}
-        params["fmt"] = "json"
-        self.rate_limiter.wait_if_needed()
-        
-        try:
-            response = self.session.get(
-                f"{self.base_url}/{endpoint}",
-                headers=self.headers,
-                params=params,
-                timeout=30
-            )
-            response.raise_for_status()
-            return response
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Request failed for endpoint {endpoint}: {str(e)}")
-            raise
+# Output files are written through a 1 MiB buffer so rows reach the OS in large chunks
+OUTPUT_BUFFER_SIZE = 1 << 20
+
+# MusicBrainz type names are a small fixed set, so they are matched case-exact
+# instead of lowercasing them for every release
+_PRIMARY_TYPES = {"Album": "album", "Single": "single", "EP": "ep"}
+_EXCLUDED_SECONDARY = frozenset(("Live", "Compilation", "Soundtrack"))
 
 class BeatlesMusicCollector:
     def __init__(self, app_name: str, version: str, contact: str):
@@ -64,11 +29,7 @@ class BeatlesMusicCollector:
         self.unique_songs = {}  # Store earliest version of each song
         
     def get_artist_id(self, artist_name: str) -> str:
-        response = self.api.make_request("artist", params={"query": artist_name})
-        artists = response.json().get("artists", [])
-        if not artists:
-            raise ValueError(f"No artist found for name: {artist_name}")
-        return artists[0]["id"]
+        return resolve_artist_id(self.api, unicodedata.normalize("NFKC", artist_name).casefold().strip())
     
     def is_valid_release(self, release: dict) -> bool:
         """
@@ -93,94 +54,156 @@ class BeatlesMusicCollector:
         release_group = release.get("release-group", {})
         
         # Exclude live recordings and compilations
-        secondary_types = [t.lower() for t in release_group.get("secondary-types", [])]
-        if any(t in secondary_types for t in ["live", "compilation", "soundtrack"]):
+        if not _EXCLUDED_SECONDARY.isdisjoint(release_group.get("secondary-types", ())):
             return False
             
         # Ensure it's a studio recording
-        primary_type = release_group.get("primary-type", "").lower()
-        if primary_type not in ["album", "single", "ep"]:
+        primary_type = _PRIMARY_TYPES.get(release_group.get("primary-type"))
+        if primary_type is None:
             return False
             
         return True
 
-    def collect_tracks(self, artist_name: str) -> Dict[str, List[dict]]:
-        """Collect unique tracks organized by year"""
+    def collect_tracks(self, artist_name: str) -> Dict[str, dict]:
+        """Collect unique tracks, keyed by song title"""
         artist_id = self.get_artist_id(artist_name)
         logger.info(f"Found artist ID: {artist_id} for {artist_name}")
         
-        tracks_by_year = defaultdict(list)
-        offset = 0
-        limit = 100
+        pages = asyncio.run(self.fetch_release_pages(artist_id))
         
-        while True:
-            try:
-                logger.info(f"Fetching releases (offset: {offset})")
-                response = self.api.make_request(
-                    "release",
-                    params={
-                        "artist": artist_id,
-                        "offset": offset,
-                        "limit": limit,
-                        "status": "official",
-                        "inc": "recordings+release-groups"
-                    }
-                )
-                
-                releases = response.json().get("releases", [])
-                logger.info(f"Retrieved {len(releases)} releases")
-                
-                if not releases:
-                    break
-                
-                for release in releases:
-                    if not self.is_valid_release(release):
-                        continue
-                        
-                    release_date = release.get("date", "")
-                    release_year = release_date[:4]
-                    
-                    for medium in release.get("media", []):
-                        for track in medium.get("tracks", []):
-                            recording = track.get("recording", {})
-                            if not recording:
+        for releases in pages:
+            logger.info(f"Retrieved {len(releases)} releases")
+            
+            for release in releases:
+                if not self.is_valid_release(release):
+                    continue
+
+                release_date = release.get("date", "")
+                release_year = release_date[:4]
+
+                for medium in release.get("media", []):
+                    for track in medium.get("tracks", []):
+                        recording = track.get("recording", {})
+                        if not recording:
+                            continue
+
+                        song_title = recording.get("title", track.get("title", "")).strip()
+
+                        # Only keep the earliest version of each song
+                        if song_title in self.unique_songs:
+                            existing_date = self.unique_songs[song_title]["release_date"]
+                            if release_date >= existing_date:
                                 continue
-                                
-                            song_title = recording.get("title", track.get("title", "")).strip()
-                            
-                            # Only keep the earliest version of each song
-                            if song_title in self.unique_songs:
-                                existing_date = self.unique_songs[song_title]["release_date"]
-                                if release_date >= existing_date:
-                                    continue
-                            
-                            track_data = {
-                                "song_title": song_title,
-                                "release_date": release_date,
-                                "release_title": release.get("title", ""),
-                                "length_seconds": recording.get("length", 0) // 1000 if recording.get("length") else None
-                            }
-                            
-                            self.unique_songs[song_title] = track_data
-                            
-                if len(releases) < limit:
-                    break
-                    
-                offset += limit
-                time.sleep(0.5)
-                
-            except requests.exceptions.RequestException as e:
-                logger.error(f"Error during pagination at offset {offset}: {str(e)}")
-                break
+
+                        track_data = {
+                            "song_title": song_title,
+                            "release_date": release_date,
+                            "release_title": release.get("title", ""),
+                            "length_seconds": recording.get("length", 0) // 1000 if recording.get("length") else None
+                        }
+
+                        self.unique_songs[song_title] = track_data
         
-        # Organize tracks by year
-        for song_data in self.unique_songs.values():
-            year = song_data["release_date"][:4]
-            tracks_by_year[year].append(song_data)
+        return self.unique_songs
+
+    def is_candidate_release_group(self, release_group: dict) -> bool:
+        """
+        Pre-filter a release group before fetching its releases:
+        - Same type rules as is_valid_release
+        - First released no later than 1970
+        """
+        if not _EXCLUDED_SECONDARY.isdisjoint(release_group.get("secondary-types", ())):
+            return False
+            
+        primary_type = _PRIMARY_TYPES.get(release_group.get("primary-type"))
+        if primary_type is None:
+            return False
+        
+        try:
+            return int(release_group.get("first-release-date", "")[:4]) <= 1970
+        except ValueError:
+            return False
+
+    async def fetch_page(self, session: aiohttp.ClientSession, endpoint: str, params: Dict, offset: int) -> Optional[dict]:
+        try:
+            logger.info(f"Fetching {endpoint} (offset: {offset})")
+            return await self.api.make_request_async(session, endpoint, {**params, "offset": offset})
+        except (aiohttp.ClientError, ijson.JSONError) as e:
+            logger.error(f"Error during pagination at offset {offset}: {str(e)}")
+            return None
+
+    async def browse_all(self, session: aiohttp.ClientSession, endpoint: str, params: Dict) -> List[List[dict]]:
+        """Fetch every page of a browse or search request. The first page gives the total
+        count; the remaining pages are then requested concurrently, paced by the rate limiter."""
+        limit = params["limit"]
+        first_page = await self.fetch_page(session, endpoint, params, 0)
+        if first_page is None:
+            return []
+        # Browse pages report "<entity>-count", search pages just "count"
+        count = first_page.get(f"{endpoint}-count", first_page.get("count", 0))
+        rest = await asyncio.gather(*(
+            self.fetch_page(session, endpoint, params, offset) for offset in range(limit, count, limit)
+        ))
+        
+        pages = [first_page.get(f"{endpoint}s", [])]
+        for page in rest:
+            # Stop at the first failed page, keeping the pages before it
+            if page is None:
+                break
+            pages.append(page.get(f"{endpoint}s", []))
+        return pages
+
+    async def fetch_release_pages(self, artist_id: str) -> List[List[dict]]:
+        """Shortlist the artist's release groups, then fetch releases with recordings
+        for those groups only. Each release gets its group attached as "release-group"."""
+        async with self.api.open_async_session() as session:
+            # Search rather than browse so groups first released after 1970 are never paged through
+            group_pages = await self.browse_all(session, "release-group", {
+                "query": f"arid:{artist_id} AND primarytype:(album OR single OR ep) "
+                         "AND firstreleasedate:[* TO 1970-12-31]",
+                "limit": 100
+            })
+            release_groups = [rg for page in group_pages for rg in page if self.is_candidate_release_group(rg)]
+            logger.info(f"Fetching releases for {len(release_groups)} release groups")
             
-        return tracks_by_year
+            release_pages = await asyncio.gather(*(
+                self.browse_all(session, "release", {
+                    "release-group": rg["id"],
+                    "status": "official",
+                    "inc": "recordings",
+                    "limit": 100
+                })
+                for rg in release_groups
+            ))
+        
+        pages = []
+        for release_group, group_release_pages in zip(release_groups, release_pages):
+            for releases in group_release_pages:
+                for release in releases:
+                    release["release-group"] = release_group
+                pages.append(releases)
+        return pages
+
+def read_existing_titles(filename: str, titles_file: str) -> Set[str]:
+    """Song titles already in the CSV, read from its sidecar titles file.
+    A CSV without a sidecar (written before it existed) is parsed once to create it."""
+    if not os.path.exists(filename):
+        return set()
+    if os.path.exists(titles_file):
+        # One title per "\n"; splitlines() would also break on \r, \x0b, \x85, \u2028
+        # and the like inside titles, and newline='' keeps \r from being translated
+        with open(titles_file, 'r', newline='', encoding='utf-8') as f:
+            titles = f.read().split("\n")
+        titles.pop()  # empty string after the final newline
+        return set(titles)
+    
+    with open(filename, 'r', newline='', encoding='utf-8') as csvfile:
+        titles = {row["song_title"] for row in csv.DictReader(csvfile)}
+    with open(titles_file, 'w', newline='', encoding='utf-8') as f:
+        f.writelines(title + "\n" for title in titles)
+    return titles
 
-def append_to_csv(tracks_by_year: Dict[str, List[dict]], filename: str):
+def append_to_csv(unique_songs: Dict[str, dict], filename: str):
     """Append tracks to CSV file, creating it if it doesn't exist"""
     fieldnames = [
         "year",
@@ -190,27 +213,36 @@ def append_to_csv(tracks_by_year: Dict[str, List[dict]], filename: str):
         "length_seconds"
     ]
     
-    # Read existing entries to avoid duplicates
-    existing_songs = set()
-    if os.path.exists(filename):
-        with open(filename, 'r', newline='', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            existing_songs = {row["song_title"] for row in reader}
+    # Titles already written, kept in a sidecar file so the CSV isn't re-parsed
+    titles_file = filename + ".titles"
+    existing_songs = read_existing_titles(filename, titles_file)
     
     # Append new entries
     mode = 'a' if os.path.exists(filename) else 'w'
-    with open(filename, mode, newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+    with open(filename, mode, newline='', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE) as csvfile, \
+         open(titles_file, mode, newline='', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE) as titlesfile:
+        # Rows are positional, in fieldnames order
+        writer = csv.writer(csvfile)
         if mode == 'w':
-            writer.writeheader()
+            writer.writerow(fieldnames)
+        
+        def new_rows():
+            # Sorting by release date also groups the songs by year
+            for track in sorted(unique_songs.values(), key=itemgetter("release_date")):
+                song_title = track["song_title"]
+                if song_title in existing_songs:
+                    continue
+                existing_songs.add(song_title)
+                titlesfile.write(song_title + "\n")
+                yield (
+                    track["release_date"][:4],
+                    song_title,
+                    track["release_date"],
+                    track["release_title"],
+                    track["length_seconds"]
+                )
         
-        for year in sorted(tracks_by_year.keys()):
-            for track in sorted(tracks_by_year[year], key=lambda x: x["release_date"]):
-                if track["song_title"] not in existing_songs:
-                    row = track.copy()
-                    row["year"] = year
-                    writer.writerow(row)
-                    existing_songs.add(track["song_title"])
+        writer.writerows(new_rows())
     
     logger.info(f"Updated {filename}")
 
@@ -224,14 +256,14 @@ def main():
     filename = "beatles_catalog_1961_1970.csv"
     
     try:
-        tracks_by_year = collector.collect_tracks("The Beatles")
+        unique_songs = collector.collect_tracks("The Beatles")
         
         # Print summary
-        for year in sorted(tracks_by_year.keys()):
-            track_count = len(tracks_by_year[year])
-            logger.info(f"Found {track_count} unique tracks from {year}")
+        tracks_per_year = Counter(track["release_date"][:4] for track in unique_songs.values())
+        for year in sorted(tracks_per_year.keys()):
+            logger.info(f"Found {tracks_per_year[year]} unique tracks from {year}")
             
-        append_to_csv(tracks_by_year, filename)
+        append_to_csv(unique_songs, filename)
         
     except Exception as e:
         logger.error(f"Failed to process The Beatles: {str(e)}")
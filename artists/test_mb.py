@@ -0,0 +1,50 @@
+import time
+import unittest
+
+from _mb import RateLimiter
+
+class RateLimiterTest(unittest.TestCase):
+    def reserve(self, limiter: RateLimiter, n: int):
+        """Deadlines of n reservations relative to now, without sleeping"""
+        start = time.monotonic()
+        return [limiter._reserve() - start for _ in range(n)]
+
+    def test_remaining_without_reset_is_spaced_by_min_delay(self):
+        limiter = RateLimiter(min_delay=1.0)
+        limiter.update({"X-RateLimit-Remaining": "5"})
+        deadlines = self.reserve(limiter, 5)
+        for earlier, later in zip(deadlines, deadlines[1:]):
+            self.assertGreaterEqual(later - earlier, 0.99)
+        self.assertTrue(limiter.remaining is None or limiter.remaining >= 0)
+
+    def test_passed_reset_falls_back_to_min_delay(self):
+        limiter = RateLimiter(min_delay=1.0)
+        limiter.update({"X-RateLimit-Remaining": "5", "X-RateLimit-Reset": str(time.time() - 10)})
+        deadlines = self.reserve(limiter, 3)
+        self.assertGreaterEqual(deadlines[2] - deadlines[0], 1.99)
+
+    def test_remaining_with_future_reset_goes_immediately(self):
+        limiter = RateLimiter(min_delay=1.0)
+        limiter.update({"X-RateLimit-Remaining": "5", "X-RateLimit-Reset": str(time.time() + 60)})
+        deadlines = self.reserve(limiter, 4)
+        self.assertLess(max(deadlines), 0.5)
+        self.assertEqual(limiter.remaining, 1)
+
+    def test_exhausted_quota_waits_for_reset_and_never_goes_negative(self):
+        limiter = RateLimiter(min_delay=1.0)
+        limiter.update({"X-RateLimit-Remaining": "1", "X-RateLimit-Reset": str(time.time() + 30)})
+        deadlines = self.reserve(limiter, 3)
+        self.assertGreater(deadlines[0], 25)
+        self.assertGreaterEqual(deadlines[2] - deadlines[0], 1.99)
+        self.assertEqual(limiter.remaining, 1)
+
+    def test_malformed_headers_fall_back_to_min_delay(self):
+        limiter = RateLimiter(min_delay=1.0)
+        limiter.update({"Retry-After": "soon"})
+        self.assertAlmostEqual(limiter.reset_at - time.monotonic(), 1.0, delta=0.1)
+        limiter = RateLimiter(min_delay=1.0)
+        limiter.update({"X-RateLimit-Remaining": "many"})
+        self.assertIsNone(limiter.remaining)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -10,18 +10,12 @@ def analyze_single_missing_letters(data: List[str]) -> Dict[str, List[str]]:
     letter_countries = defaultdict(list)
     
     for line in data:
-        if ':' not in line:
+        i = line.find(':')
+        # Only process countries with exactly one missing letter (no comma after the colon)
+        if i < 0 or ',' in line[i:]:
             continue
-            
-        country, letters = line.split(':')
-        country = country.strip()
-        # Split letters by comma and clean up
-        missing_letters = [l.strip() for l in letters.split(',')]
         
-        # Only process countries with exactly one missing letter
-        if len(missing_letters) == 1:
-            letter = missing_letters[0]
-            letter_countries[letter].append(country)
+        letter_countries[line[i + 1:].strip()].append(line[:i].strip())
     
     return letter_countries
 
@@ -1,11 +1,40 @@
-from typing import List, Tuple, Dict
-from collections import defaultdict
+from typing import List, Tuple, Dict, Optional
+from collections import Counter, defaultdict
+from contextlib import ExitStack, nullcontext
+from functools import lru_cache
+from itertools import chain, islice
+from multiprocessing import Pool
 import sys
 
+# Letter codes: a-z and A-Z map to 0-25, anything else to 26, which no symbol starts with.
+# Folding case in this byte table spares ASCII words a str.lower() call.
+ALPHABET_SIZE = 27
+_LETTER_CODES = bytes(b - 97 if 97 <= b <= 122 else b - 65 if 65 <= b <= 90 else 26
+                      for b in range(256))
+
+def encode_word(word: str) -> bytes:
+    """Case-insensitive letter codes of a word, one per character."""
+    if not word.isascii():
+        # Leave Unicode case rules to str.lower()
+        word = word.lower()
+    return word.encode('ascii', 'replace').translate(_LETTER_CODES)
+
+# A path is built as linked (symbol, rest) nodes ending in None, so suffixes are
+# shared between paths instead of copied at every step
+PathNode = Optional[Tuple[object, 'PathNode']]
+
+def unlink_path(node: PathNode) -> list:
+    """Flatten a linked path into a list of its symbols."""
+    path = []
+    while node is not None:
+        path.append(node[0])
+        node = node[1]
+    return path
+
 class PeriodicSpeller:
     def __init__(self):
         # Previous element definitions remain the same
-        self.elements = {
+        self.elements = frozenset({
             'H', 'He', 'Li', 'Be', 'B', 'C', 'N', 'O', 'F', 'Ne',
             'Na', 'Mg', 'Al', 'Si', 'P', 'S', 'Cl', 'Ar', 'K', 'Ca',
             'Sc', 'Ti', 'V', 'Cr', 'Mn', 'Fe', 'Co', 'Ni', 'Cu', 'Zn',
@@ -18,159 +47,254 @@ class PeriodicSpeller:
             'Pa', 'U', 'Np', 'Pu', 'Am', 'Cm', 'Bk', 'Cf', 'Es', 'Fm',
             'Md', 'No', 'Lr', 'Rf', 'Db', 'Sg', 'Bh', 'Hs', 'Mt', 'Ds',
             'Rg', 'Cn', 'Nh', 'Fl', 'Mc', 'Lv', 'Ts', 'Og'
-        }
-        self.elements_lower = {elem.lower() for elem in self.elements}
+        })
+        # Symbol tables indexed by letter code: symbol1[a] for one-letter symbols and
+        # symbol2[a * ALPHABET_SIZE + b] for two-letter ones. Entries are
+        # (original case, lowercase) pairs, or None where no symbol exists.
+        self.symbol1: List[Optional[Tuple[str, str]]] = [None] * ALPHABET_SIZE
+        self.symbol2: List[Optional[Tuple[str, str]]] = [None] * (ALPHABET_SIZE * ALPHABET_SIZE)
+        # Validity bitmasks: bit a of mask1 is set iff symbol1[a] exists, and bit b
+        # of mask2[a] iff symbol2[a * ALPHABET_SIZE + b] does
+        self.mask1 = 0
+        self.mask2: List[int] = [0] * ALPHABET_SIZE
+        self.elem_lower: Dict[str, str] = {elem: elem.lower() for elem in self.elements}
+        for elem in self.elements:
+            codes = encode_word(elem)
+            if len(codes) == 1:
+                self.symbol1[codes[0]] = (elem, elem.lower())
+                self.mask1 |= 1 << codes[0]
+            else:
+                self.symbol2[codes[0] * ALPHABET_SIZE + codes[1]] = (elem, elem.lower())
+                self.mask2[codes[0]] |= 1 << codes[1]
 
     def find_missing_letters(self, word: str, solution: List[str]) -> List[str]:
         """Find which letters are missing from a partial solution."""
-        word = word.lower()
-        # Create a string of all letters covered by the solution
-        covered_letters = ''
-        for element in solution:
-            covered_letters += element.lower()
-        
-        # Create copy of word to track missing letters
-        word_remaining = list(word)
-        covered_remaining = list(covered_letters)
-        
-        # Remove matched letters
-        for letter in covered_letters:
-            if letter in word_remaining:
-                word_remaining.remove(letter)
-                covered_remaining.remove(letter)
+        elem_lower = self.elem_lower
+        covered_letters = ''.join(elem_lower[element] if element in elem_lower else element.lower()
+                                  for element in solution)
+        return self._uncovered_letters(word.lower(), covered_letters)
+
+    def _uncovered_letters(self, word: str, covered_letters: str) -> List[str]:
+        """find_missing_letters for an already lowercased word and covered letters."""
+        covered = Counter(covered_letters)
         
-        # Return remaining letters from original word
-        return [letter.upper() for letter in word_remaining]
+        # Each covered letter cancels its earliest occurrence in the word;
+        # the rest are missing, in word order
+        missing = []
+        for letter in word:
+            if covered[letter] > 0:
+                covered[letter] -= 1
+            else:
+                missing.append(letter.upper())
+        return missing
 
     # Previous methods remain the same
     def find_all_spellings(self, word: str) -> List[List[str]]:
-        word = word.lower()
+        codes = encode_word(word)
+        n = len(codes)
+        mask1, mask2 = self.mask1, self.mask2
         
-        def backtrack(remaining: str, current_path: List[str], all_paths: List[List[str]]):
-            if not remaining:
-                all_paths.append(current_path[:])
-                return
-            
-            for length in [1, 2]:
-                if len(remaining) >= length:
-                    prefix = remaining[:length]
-                    if prefix in self.elements_lower:
-                        original_case = next(e for e in self.elements if e.lower() == prefix)
-                        backtrack(remaining[length:], current_path + [original_case], all_paths)
+        # ways[i] holds every spelling of word[i:], built from the end of the word
+        # so each suffix is solved once. Trying 1- then 2-letter symbols keeps the
+        # same solution order as a depth-first search.
+        ways: List[List[PathNode]] = [[] for _ in range(n + 1)]
+        ways[n] = [None]
+        for i in range(n - 1, -1, -1):
+            a = codes[i]
+            if mask1 >> a & 1:
+                symbol = self.symbol1[a][0]
+                ways[i].extend((symbol, tail) for tail in ways[i + 1])
+            if i + 1 < n and mask2[a] >> codes[i + 1] & 1:
+                symbol = self.symbol2[a * ALPHABET_SIZE + codes[i + 1]][0]
+                ways[i].extend((symbol, tail) for tail in ways[i + 2])
+            if not ways[i] and not ways[i + 1]:
+                # Symbols span at most two letters, so no spelling can get past
+                # two unspellable suffixes in a row
+                return []
         
-        solutions = []
-        backtrack(word, [], solutions)
-        return solutions
+        return [unlink_path(node) for node in ways[0]]
     
     def find_closest_match(self, word: str) -> List[Tuple[List[str], int, List[str]]]:
         """Modified to include missing letters in the return value."""
-        word = word.lower()
-        best_solutions = []
-        min_missing = float('inf')
+        return self._closest_match(word.lower())
+    
+    def _closest_match(self, word: str) -> List[Tuple[List[str], int, List[str]]]:
+        """find_closest_match for an already lowercased word."""
+        codes = encode_word(word)
+        n = len(codes)
+        mask1, mask2 = self.mask1, self.mask2
         
-        def try_partial_match(pos: int, current_path: List[str], letters_used: int):
-            nonlocal min_missing, best_solutions
-            missing_letters = len(word) - letters_used
-            
-            if pos >= len(word):
-                if missing_letters <= min_missing:
-                    if missing_letters < min_missing:
-                        best_solutions = []
-                        min_missing = missing_letters
-                    missing_letters_list = self.find_missing_letters(word, current_path)
-                    best_solutions.append((current_path, missing_letters, missing_letters_list))
-                return
+        # Suffix DP: missing[i] is the fewest letters of word[i:] left uncovered, and
+        # moves[i] every (symbol or None for a skipped letter, letters consumed) step
+        # achieving it. Options are taken in the order 1-letter symbol, 2-letter
+        # symbol, skip a letter, so paths come out in the same order as a depth-first
+        # search over those choices. Symbols are (original case, lowercase) pairs.
+        missing = [0] * (n + 1)
+        moves: List[list] = [[] for _ in range(n)]
+        for i in range(n - 1, -1, -1):
+            a = codes[i]
+            one = self.symbol1[a] if mask1 >> a & 1 else None
+            two = (self.symbol2[a * ALPHABET_SIZE + codes[i + 1]]
+                   if i + 1 < n and mask2[a] >> codes[i + 1] & 1 else None)
             
-            for length in [1, 2]:
-                if pos + length <= len(word):
-                    prefix = word[pos:pos + length]
-                    if prefix in self.elements_lower:
-                        original_case = next(e for e in self.elements if e.lower() == prefix)
-                        try_partial_match(pos + length, current_path + [original_case], 
-                                       letters_used + length)
+            best = missing[i + 1] + 1
+            if one:
+                best = min(best, missing[i + 1])
+            if two:
+                best = min(best, missing[i + 2])
+            missing[i] = best
             
-            try_partial_match(pos + 1, current_path, letters_used)
+            if one and missing[i + 1] == best:
+                moves[i].append((one, 1))
+            if two and missing[i + 2] == best:
+                moves[i].append((two, 2))
+            if missing[i + 1] + 1 == best:
+                moves[i].append((None, 1))
         
-        try_partial_match(0, [], 0)
-        return best_solutions
+        # Prune: only suffixes reachable from the start through optimal moves can be
+        # part of a best path, so paths are never built for the rest
+        live = [False] * (n + 1)
+        live[0] = True
+        for i in range(n):
+            if live[i]:
+                for _, step in moves[i]:
+                    live[i + step] = True
+        
+        paths: List[List[PathNode]] = [[] for _ in range(n + 1)]
+        paths[n] = [None]
+        for i in range(n - 1, -1, -1):
+            if not live[i]:
+                continue
+            for symbol, step in moves[i]:
+                if symbol:
+                    paths[i].extend((symbol, tail) for tail in paths[i + step])
+                else:
+                    paths[i].extend(paths[i + step])
+        
+        closest = []
+        for node in paths[0]:
+            path = unlink_path(node)
+            closest.append(([symbol for symbol, _ in path], missing[0],
+                            self._uncovered_letters(word, ''.join(lower for _, lower in path))))
+        return closest
     
     def spell_word(self, word: str) -> Dict:
-        exact_solutions = self.find_all_spellings(word)
-        closest_matches = self.find_closest_match(word)
+        # Repeated words are served from the cache; fresh lists are handed out each time.
+        # Lowercasing here keys the cache case-insensitively and is the only case
+        # conversion on this path.
+        exact_solutions, closest_matches = _cached_spellings(self, word.lower())
         
         return {
             'word': word,
             'can_be_spelled': len(exact_solutions) > 0,
-            'exact_solutions': exact_solutions,
-            'closest_matches': closest_matches if not exact_solutions else []
+            'exact_solutions': [list(solution) for solution in exact_solutions],
+            'closest_matches': [(list(solution), missing, list(missing_letters))
+                                for solution, missing, missing_letters in closest_matches]
         }
 
+# Distinct words whose spellings are kept; bounded so streaming a large input stays in constant memory
+SPELLING_CACHE_SIZE = 1 << 16
+
+@lru_cache(maxsize=SPELLING_CACHE_SIZE)
+def _cached_spellings(speller: PeriodicSpeller, word: str) -> Tuple[tuple, tuple]:
+    """Exact solutions and closest matches for a lowercase word, as tuples so they can be shared."""
+    exact_solutions = tuple(tuple(solution) for solution in speller.find_all_spellings(word))
+    if exact_solutions:
+        # Closest matches are only reported for words that cannot be spelled
+        return exact_solutions, ()
+    closest_matches = tuple((tuple(solution), missing, tuple(missing_letters))
+                            for solution, missing, missing_letters in speller._closest_match(word))
+    return exact_solutions, closest_matches
+
+# Buffer size for the report files
+OUTPUT_BUFFER_SIZE = 1 << 20
+# Inputs with fewer words than this are solved in-process, where a pool costs more than it saves
+PARALLEL_MIN_WORDS = 2000
+# Words handed to a worker process per task
+PARALLEL_CHUNK_SIZE = 128
+
+_worker_speller: Optional[PeriodicSpeller] = None
+
+def _init_worker():
+    """Give each worker process its own speller (and spelling cache)."""
+    global _worker_speller
+    _worker_speller = PeriodicSpeller()
+
+def _spell_word_in_worker(word: str) -> Dict:
+    return _worker_speller.spell_word(word)
+
+def format_solutions(result: Dict) -> str:
+    """Solution lines of a result, shared by the console and file reports."""
+    lines = []
+    if result['can_be_spelled']:
+        for i, solution in enumerate(result['exact_solutions'], 1):
+            lines.append(f"{i}. {' + '.join(solution)}\n")
+    else:
+        for solution, missing, missing_letters in result['closest_matches']:
+            lines.append(f"Missing {missing} letters: {' + '.join(solution)}\n")
+            if missing_letters:
+                lines.append(f"Letters needed: {', '.join(missing_letters)}\n")
+    return ''.join(lines)
+
 def process_file(filename: str, output_filename: str = None, missing_letters_filename: str = None):
     """
     Process a file containing words, one per line.
     Now includes option for a separate missing letters summary file.
     """
-    speller = PeriodicSpeller()
-    results = []
-    missing_letters_summary = []
+    missing_file = None
     
     try:
-        # Read input file
-        with open(filename, 'r', encoding='utf-8') as f:
-            words = [line.strip() for line in f if line.strip()]
-        
-        # Process each word
-        for word in words:
-            result = speller.spell_word(word)
-            results.append(result)
+        # Words are streamed from the input and each report is written as it is
+        # produced, so memory use doesn't grow with the input beyond the bounded spelling cache
+        with open(filename, 'r', encoding='utf-8') as f, \
+             (open(output_filename, 'w', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE)
+              if output_filename else nullcontext()) as output_file, \
+             ExitStack() as lazy_files:
+            words = (word for word in map(str.strip, f) if word)
             
-            # If word can't be spelled exactly, add its missing letters to summary
-            if not result['can_be_spelled'] and result['closest_matches']:
-                # Get the first (best) match's missing letters
-                best_match = result['closest_matches'][0]
-                missing_letters = best_match[2]  # [2] contains missing letters list
-                if missing_letters:
-                    missing_letters_summary.append(f"{word}: {', '.join(missing_letters)}")
-            
-            # Console output remains the same
-            print(f"\nAnalyzing: {result['word']}")
-            if result['can_be_spelled']:
-                print("✓ Can be spelled with elements!")
-                print("Solutions:")
-                for i, solution in enumerate(result['exact_solutions'], 1):
-                    print(f"{i}. {' + '.join(solution)}")
-            else:
-                print("✗ Cannot be spelled exactly with elements")
-                print("Closest matches:")
-                for solution, missing, missing_letters in result['closest_matches']:
-                    print(f"Missing {missing} letters: {' + '.join(solution)}")
-                    if missing_letters:
-                        print(f"Letters needed: {', '.join(missing_letters)}")
-        
-        # Write main output file if specified
-        if output_filename:
-            with open(output_filename, 'w', encoding='utf-8') as f:
+            # Words are independent, so large inputs are spread over all cores;
+            # imap keeps results in input order
+            head = list(islice(words, PARALLEL_MIN_WORDS))
+            parallel = len(head) == PARALLEL_MIN_WORDS
+            words = chain(head, words)
+            with (Pool(initializer=_init_worker) if parallel else nullcontext()) as pool:
+                if parallel:
+                    results = pool.imap(_spell_word_in_worker, words, chunksize=PARALLEL_CHUNK_SIZE)
+                else:
+                    results = map(PeriodicSpeller().spell_word, words)
                 for result in results:
-                    f.write(f"\nWord: {result['word']}\n")
+                    # If word can't be spelled exactly, add its missing letters to summary
+                    if not result['can_be_spelled'] and result['closest_matches']:
+                        # Get the first (best) match's missing letters
+                        best_match = result['closest_matches'][0]
+                        missing_letters = best_match[2]  # [2] contains missing letters list
+                        if missing_letters and missing_letters_filename:
+                            # Opened on first use so no summary file is left when nothing is missing
+                            if missing_file is None:
+                                missing_file = lazy_files.enter_context(
+                                    open(missing_letters_filename, 'w', encoding='utf-8',
+                                         buffering=OUTPUT_BUFFER_SIZE))
+                            missing_file.write(f"{result['word']}: {', '.join(missing_letters)}\n")
+                    
+                    # Each report is assembled as one string and written once
+                    solutions = format_solutions(result)
                     if result['can_be_spelled']:
-                        f.write("Can be spelled with elements!\n")
-                        f.write("Solutions:\n")
-                        for i, solution in enumerate(result['exact_solutions'], 1):
-                            f.write(f"{i}. {' + '.join(solution)}\n")
+                        sys.stdout.write(f"\nAnalyzing: {result['word']}\n"
+                                         f"✓ Can be spelled with elements!\nSolutions:\n{solutions}")
+                        if output_file:
+                            output_file.write(f"\nWord: {result['word']}\n"
+                                              f"Can be spelled with elements!\nSolutions:\n{solutions}")
                     else:
-                        f.write("Cannot be spelled exactly with elements\n")
-                        f.write("Closest matches:\n")
-                        for solution, missing, missing_letters in result['closest_matches']:
-                            f.write(f"Missing {missing} letters: {' + '.join(solution)}\n")
-                            if missing_letters:
-                                f.write(f"Letters needed: {', '.join(missing_letters)}\n")
+                        sys.stdout.write(f"\nAnalyzing: {result['word']}\n"
+                                         f"✗ Cannot be spelled exactly with elements\nClosest matches:\n{solutions}")
+                        if output_file:
+                            output_file.write(f"\nWord: {result['word']}\n"
+                                              f"Cannot be spelled exactly with elements\nClosest matches:\n{solutions}")
+        
+        if output_filename:
             print(f"\nResults have been saved to {output_filename}")
         
-        # Write missing letters summary file if specified
-        if missing_letters_filename and missing_letters_summary:
-            with open(missing_letters_filename, 'w', encoding='utf-8') as f:
-                for line in missing_letters_summary:
-                    f.write(f"{line}\n")
+        if missing_file is not None:
             print(f"Missing letters summary saved to {missing_letters_filename}")
                 
     except FileNotFoundError: